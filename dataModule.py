@@ -1,3 +1,5 @@
+import csv
+import io
 import pandas as pd
 import returnClasses as rc
 import date_functions as dtf
@@ -6,20 +8,100 @@ import date_functions as dtf
 The columns contain fund/index returns"""
 
 
-def csv_to_df(file, dateformat='%d/%m/%Y'):
-    # Converts csv to DataFrame, sets index to dates
-    # first column in csv file has to contain dates
-    df = pd.read_csv(file)
+def csv_to_df(file, dateformat='%d/%m/%Y', start=None, end=None, usecols=None, dtype=None):
+    """"Converts csv to DataFrame, sets index to dates. First column in csv file has to contain dates
+    Args:
+        file(str, file-like): path to csv file, anything pd.read_csv accepts when no start or end is given
+        dateformat(str): format of the dates in the first column
+        start(str, pd.Timestamp): first date to load, partial strings like 'yyyy-mm' select from the start of the month
+        end(str, pd.Timestamp): last date to load, partial strings like 'yyyy-mm' select till the end of the month
+        usecols(list(str)): columns to load besides the date column, default loads all columns
+        dtype(str, dict): dtype of the loaded columns, default lets pandas infer them. The date column is always read
+         as str
+    Returns:
+        DataFrame with a DateTimeIndex
+    With a start or end and a year first dateformat (i.e. '%Y%m%d', '%Y-%m-%d') rows are filtered while reading and
+    reading stops at the first date after end, this expects a file sorted ascending by date. Files found to be out of
+    order are read in full, sorted and sliced instead, as is done for other dateformats"""
+
+    daterange = start is not None or end is not None
+    lines = None
+    if daterange and _is_sortable_format(dateformat):
+        with open(file, encoding='utf-8') as f:
+            names = next(csv.reader([f.readline()]))
+            lines = _lines_in_daterange(f, dateformat, start, end)  # None when file is not sorted ascending
+
+    if lines is not None:
+        names[0] = names[0] or 'Date'  # fama french files have no name for the date column
+        if usecols is not None:
+            usecols = [names[0]] + [col for col in usecols if col != names[0]]
+        if dtype is None:
+            dtype = {}
+        elif not isinstance(dtype, dict):
+            dtype = {col: dtype for col in names[1:] if usecols is None or col in usecols}
+        dtype = dict(dtype, **{names[0]: str})
+        df = pd.read_csv(io.StringIO(''.join(lines)), header=None, names=names, usecols=usecols, dtype=dtype)
+    else:
+        # pandas reads the header, the date column is selected by position
+        df = pd.read_csv(file, header=0, dtype=dict(dtype, **{0: str}) if isinstance(dtype, dict) else {0: str})
+        if df.columns[0] == 'Unnamed: 0':
+            df = df.rename(columns={'Unnamed: 0': 'Date'})  # fama french files have no name for the date column
+        if usecols is not None:
+            df = df[[df.columns[0]] + [col for col in usecols if col != df.columns[0]]]
+        if dtype is not None and not isinstance(dtype, dict):
+            df = df.astype({col: dtype for col in df.columns[1:]})
+
     df = df.set_index(df.columns[0])  # sets first column as index
-    df.index = pd.to_datetime(df.index, format=dateformat, errors='coerce').normalize()
+    df.index = pd.to_datetime(df.index, format=dateformat, errors='coerce', cache=True).normalize()
+    if daterange and lines is None:
+        df = df[df.index.notna()].sort_index()[start:end]  # rows could not be filtered while reading
     return pd.DataFrame(df)
 
 
+# Helper Functions
+# ==============================================================
+
+
+def _is_sortable_format(dateformat):
+    # True when dates in dateformat sort the same as strings (i.e. '%Y%m%d', '%Y-%m-%d')
+    positions = [dateformat.find(directive) for directive in ('%Y', '%m', '%d')]
+    return positions[0] == 0 and positions == sorted(positions)
+
+
+def _lines_in_daterange(lines, dateformat, start=None, end=None):
+    # returns the lines of a date sorted csv file of which the date prefix lies between start and end. Dates are
+    # compared as strings so rows outside the range are skipped before any parsing is done. Only works for dateformats
+    # for which _is_sortable_format is True. Returns None when a date is lower than the date before it
+    startKey = pd.Timestamp(start).strftime(dateformat) if start is not None else None
+    if isinstance(end, str):
+        end = pd.Period(end).end_time  # include the whole period of partial date strings
+    endKey = pd.Timestamp(end).strftime(dateformat) if end is not None else None
+    width = len(startKey or endKey)
+
+    selected = []
+    prevKey = None
+    for line in lines:
+        key = line.lstrip('"')[:width]  # dates can be quoted
+        if not key[:1].isdigit():
+            continue  # skips empty and copyright lines
+        if prevKey is not None and key < prevKey:
+            return None  # file is not sorted ascending by date
+        if endKey is not None and key > endKey:
+            if prevKey is not None:
+                break  # file is sorted ascending, no more dates in range
+        elif startKey is None or key >= startKey:
+            selected.append(line)
+        prevKey = key
+    return selected
+
+
 # load csv files into data frames
 # ==============================================================
 
 
-def get_data():
+def get_data(start='2010-02', end=None):
+    """"loads fund, benchmark and fama french factor returns between start and end in a ReturnFrame, the first
+     period of a start string is used to calculate the first price returns. start=None loads all available dates"""
     folder = 'data\\'
 
     # specify fund and benchmark files
@@ -28,19 +110,23 @@ def get_data():
     ffCsv = folder + 'F-F_Research_Data_Factors_daily.CSV'
 
     # make sure dateformat below is consistent with files
-    fundDf = csv_to_df(fundCsv, dateformat='%Y-%m-%d')
-    benchmarkDf = csv_to_df(benchmarkCsv, dateformat='%Y-%m-%d')
-    ffDf = csv_to_df(ffCsv, dateformat='%Y%m%d').divide(100)
+    fundDf = csv_to_df(fundCsv, dateformat='%Y-%m-%d', start=start, end=end, usecols=['Adj Close'],
+                       dtype='float64')
+    benchmarkDf = csv_to_df(benchmarkCsv, dateformat='%Y-%m-%d', start=start, end=end, usecols=['Adj Close'],
+                            dtype='float64')
+    ffDf = csv_to_df(ffCsv, dateformat='%Y%m%d', start=start, end=end, dtype='float64').divide(100)
 
     # create price DataFrame
     df = pd.DataFrame(fundDf['Adj Close']).rename(columns={'Adj Close': 'Fund'})
     df = df.join(benchmarkDf['Adj Close'], how='outer').rename(columns={'Adj Close': 'BM'})
-    df = df['2010-02':].dropna()
+    df = df.dropna()
 
-    # create return DataFrame
+    # create return DataFrame, the first row has no return and is dropped with the first period
     df = df.pct_change()
     df = df.join(ffDf, how='outer')
-    df = df['2010-03':].dropna()
+    if isinstance(start, str):
+        df = df[pd.Period(start).end_time:]  # first period only has prices, a Timestamp start only drops its first row
+    df = df.dropna()
     df = rc.ReturnFrame(df)  # convert DataFrame to ReturnFrame
     return df
 
@@ -0,0 +1,241 @@
+import timeit
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional, the numpy kernels are used without it
+    numba = None
+
+""""module with the loop shaped kernels used by returnClasses. Each kernel has a pure numpy implementation and a loop
+implementation that is JIT compiled when numba is installed. The numba backend is used by default when available,
+set_backend() switches between backends at runtime. All kernels take and return 1d float64 numpy arrays"""
+
+
+# numpy kernels
+# ==========================================================================
+
+
+def _chainlink_numpy(returns):
+    return np.prod(returns + 1) - 1
+
+
+def _compounded_path_numpy(returns):
+    return np.cumprod(returns + 1) - 1
+
+
+def _period_chainlink_numpy(returns, ends):
+    # multiply.reduceat does not handle empty periods, these keep a compounded return of 0. reduceat runs the last
+    # period till the end of the array, so returns after ends[-1] are cut off first
+    starts = np.concatenate(([0], ends))[:-1]
+    compounded = np.zeros(len(ends))
+    filled = starts < ends
+    if filled.any():
+        compounded[filled] = np.multiply.reduceat(returns[:ends[-1]] + 1, starts[filled]) - 1
+    return compounded
+
+
+def _rolling_moments_numpy(returns, window):
+    mean = np.full(len(returns), np.nan)
+    sigma = np.full(len(returns), np.nan)
+    if 1 <= window <= len(returns):
+        windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        if window > 1:  # sigma uses ddof=1 and needs at least 2 returns
+            sigma[window - 1:] = windows.std(axis=1, ddof=1)
+    return mean, sigma
+
+
+# loop kernels, JIT compiled by numba
+# ==========================================================================
+
+
+def _chainlink_loop(returns):
+    r_compounded = 1.0
+    for r in returns:
+        r_compounded *= r + 1
+    return r_compounded - 1
+
+
+def _compounded_path_loop(returns):
+    compounded = np.empty(len(returns))
+    r_compounded = 1.0
+    for i in range(len(returns)):
+        r_compounded *= returns[i] + 1
+        compounded[i] = r_compounded - 1
+    return compounded
+
+
+def _period_chainlink_loop(returns, ends):
+    # compounding is reset to 1 at every period boundary in ends
+    compounded = np.empty(len(ends))
+    start = 0
+    for p in range(len(ends)):
+        r_compounded = 1.0
+        for i in range(start, ends[p]):
+            r_compounded *= returns[i] + 1
+        compounded[p] = r_compounded - 1
+        start = ends[p]
+    return compounded
+
+
+def _rolling_moments_loop(returns, window):
+    # slides the mean and sum of squared deviations (m2) one return at a time with Welford's update, the window is
+    # only recomputed in full at the start and after a nan has left the window
+    mean = np.full(len(returns), np.nan)
+    sigma = np.full(len(returns), np.nan)
+    if window < 1:
+        return mean, sigma
+    m = 0.0
+    m2 = 0.0
+    valid = False  # True when m and m2 hold the moments of the previous window
+    for i in range(window - 1, len(returns)):
+        if valid:
+            r_new = returns[i]
+            r_old = returns[i - window]
+            delta = r_new - r_old
+            m_old = m
+            m += delta / window
+            m2 += delta * (r_new - m + r_old - m_old)
+        else:
+            total = 0.0
+            for j in range(i - window + 1, i + 1):
+                total += returns[j]
+            m = total / window
+            m2 = 0.0
+            for j in range(i - window + 1, i + 1):
+                m2 += (returns[j] - m) ** 2
+        valid = not np.isnan(m2)
+        mean[i] = m
+        if window > 1:
+            sigma[i] = (max(m2, 0.0) / (window - 1)) ** 0.5
+    return mean, sigma
+
+
+# backend selection
+# ==========================================================================
+
+
+_KERNELS = {
+    'numpy': {
+        'chainlink': _chainlink_numpy,
+        'compounded_path': _compounded_path_numpy,
+        'period_chainlink': _period_chainlink_numpy,
+        'rolling_moments': _rolling_moments_numpy,
+    }
+}
+
+if numba is not None:
+    _KERNELS['numba'] = {
+        'chainlink': numba.njit(cache=True)(_chainlink_loop),
+        'compounded_path': numba.njit(cache=True)(_compounded_path_loop),
+        'period_chainlink': numba.njit(cache=True)(_period_chainlink_loop),
+        'rolling_moments': numba.njit(cache=True)(_rolling_moments_loop),
+    }
+
+_backend = 'numba' if numba is not None else 'numpy'
+
+
+def available_backends():
+    return list(_KERNELS)
+
+
+def get_backend():
+    return _backend
+
+
+def set_backend(backend):
+    # switches the kernels used by returnClasses, backend is 'numpy' or 'numba' (when numba is installed)
+    global _backend
+    if backend not in _KERNELS:
+        raise ValueError("backend '{}' is not available, choose from {}".format(backend, available_backends()))
+    _backend = backend
+
+
+def _kernel(name, backend=None):
+    return _KERNELS[backend or _backend][name]
+
+
+# kernels used by returnClasses
+# ==========================================================================
+
+
+def chainlink(returns, backend=None):
+    # returns a single compounded return of all returns
+    return float(_kernel('chainlink', backend)(np.asarray(returns, dtype=np.float64)))
+
+
+def compounded_path(returns, backend=None):
+    # returns the compounded return up to and including each return
+    return _kernel('compounded_path', backend)(np.asarray(returns, dtype=np.float64))
+
+
+def period_chainlink(returns, ends, backend=None):
+    """" returns the compounded return per period
+    Args:
+        returns(array): returns sorted by date
+        ends(array(int)): position after the last return of each period, empty periods have a compounded return of 0.
+         Returns after ends[-1] are ignored
+        backend(str): 'numpy' or 'numba', default uses the backend set with set_backend()"""
+    return _kernel('period_chainlink', backend)(np.asarray(returns, dtype=np.float64),
+                                                np.asarray(ends, dtype=np.int64))
+
+
+def rolling_moments(returns, window, backend=None):
+    # returns tuple(mean, sigma) over a rolling window, the first window - 1 values are nan. sigma uses ddof=1 so it
+    # is nan for window=1
+    return _kernel('rolling_moments', backend)(np.asarray(returns, dtype=np.float64), int(window))
+
+
+# parity test and benchmark
+# ==========================================================================
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    years = 60
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0003, 0.01, size=years * 251)
+    ends = np.arange(21, len(returns), 21)
+    ends = np.append(np.insert(ends, 10, ends[9]), len(returns))  # includes an empty period
+    gaps = returns.copy()
+    gaps[[300, 301, 5000]] = np.nan  # nan entering and leaving the rolling window
+
+    # reference test, the numpy backend has to give the same rolling moments as pandas
+    for window in (1, 2, 251):
+        rolling = pd.Series(gaps).rolling(window)
+        mean, sigma = rolling_moments(gaps, window, 'numpy')
+        assert np.allclose(mean, rolling.mean(), equal_nan=True)
+        assert np.allclose(sigma, rolling.std(), equal_nan=True)
+
+    # parity test, all backends have to give the same results as the numpy backend
+    for backend in available_backends():
+        assert np.isclose(chainlink(returns, backend), chainlink(returns, 'numpy'))
+        assert np.allclose(compounded_path(returns, backend), compounded_path(returns, 'numpy'))
+        for periodEnds in (ends, ends[:-1]):  # ends[:-1] leaves returns after the last period
+            assert np.allclose(period_chainlink(returns, periodEnds, backend),
+                               period_chainlink(returns, periodEnds, 'numpy'))
+        assert np.allclose(period_chainlink([.1, .1, .2, .5], [1, 2], backend), [.1, .1])
+        for window in (1, 2, 251, len(returns), len(returns) + 1):
+            for data in (returns, gaps):
+                for moment, expected in zip(rolling_moments(data, window, backend),
+                                            rolling_moments(data, window, 'numpy')):
+                    assert np.allclose(moment, expected, equal_nan=True)
+    print('reference and parity test passed for backends: {}'.format(available_backends()))
+    print()
+
+    # benchmark, numba kernels are already compiled during the parity test above
+    benchmarks = {
+        'chainlink': lambda backend: chainlink(returns, backend),
+        'compounded_path': lambda backend: compounded_path(returns, backend),
+        'period_chainlink': lambda backend: period_chainlink(returns, ends, backend),
+        'rolling_moments': lambda backend: rolling_moments(returns, 251, backend),
+    }
+    print('benchmark on {} years of daily returns, ms per call'.format(years))
+    for name, run in benchmarks.items():
+        timings = {backend: min(timeit.repeat(lambda: run(backend), number=10, repeat=5)) / 10 * 1000
+                   for backend in available_backends()}
+        line = '{:<18}'.format(name) + ''.join('{}: {:8.3f}   '.format(b, t) for b, t in timings.items())
+        if 'numba' in timings:
+            line += 'speedup: {:.1f}x'.format(timings['numpy'] / timings['numba'])
+        print(line)
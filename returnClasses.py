@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 import statsmodels.api as sm
 import date_functions as dtf
+import kernels
 
 
 # helper functions, the following functions are used in the ReturnSeries and ReturnFrame classes
@@ -26,15 +27,19 @@ def _is_empty(collection):
 
 
 def _period_returns(_self, freq='M'):
-    return _self.resample(freq).apply(lambda x: _chainlink(x))
+    # compounds the returns of each period in one pass, ends holds the position after the last return per period
+    _self = _self.sort_index()
+    counts = _self.resample(freq).size()
+    ends = counts.cumsum().values
+    if isinstance(_self, pd.Series):
+        return _self._constructor(kernels.period_chainlink(_self.values, ends), index=counts.index, name=_self.name)
+    return _self._constructor({col: kernels.period_chainlink(_self[col].values, ends) for col in _self.columns},
+                              index=counts.index, columns=_self.columns)
 
 
-# _chainlink function 3 to 4 times faster than pandas.Series.compound
+# _chainlink uses the kernel backend set in the kernels module (numba when installed, else numpy)
 def _chainlink(returns):
-    r_compounded = 1
-    for r in returns:
-        r_compounded *= r + 1
-    return r_compounded - 1
+    return kernels.chainlink(returns)
 
 
 # ===========================================================================
@@ -167,13 +172,16 @@ class ReturnSeries(pd.Series):
         end = dtf.get_month_end(self, monthEndDate)
         start = dtf.ts_date(monthStartDate) - pd.offsets.BMonthBegin(n=0)
         period = self[start:end]
-        compoundedSrs = pd.Series(index=period.index)
-        for i in range(len(period)):
-            if i == 0:
-                compoundedSrs.iloc[i] = period.iloc[0]
-            else:
-                compoundedSrs.iloc[i] = (compoundedSrs.iloc[i - 1] + 1) * (period.iloc[i] + 1) - 1
-        return compoundedSrs
+        return pd.Series(kernels.compounded_path(period.values), index=period.index)
+
+    def rolling_moments(self, window=251):
+        """"Returns rolling mean and standard deviation of the returns
+        Args:
+            window(int): number of returns in each window, default is 251 days (1 year)
+        Returns:
+            DataFrame with columns mean and sigma, the first window - 1 rows are nan"""
+        mean, sigma = kernels.rolling_moments(self.values, window)
+        return pd.DataFrame({'mean': mean, 'sigma': sigma}, index=self.index)
 
 
 class ReturnFrame(pd.DataFrame):